@@ -1,10 +1,13 @@
 import streamlit as st
-import json
+import orjson
+import io
+import hashlib
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from extractor.crawler import crawl_and_extract
-from extractor.inference import extract_modules_with_ai
+from pathlib import Path
+from extractor.results import ExtractResult
 import logging
 
 # Import configuration
@@ -20,21 +23,95 @@ except ValueError as e:
     st.info("Please check your .env file and ensure all required variables are set.")
     st.stop()
 
-# Configure logging to save to logs folder
-os.makedirs('logs', exist_ok=True)
-log_filename = f"logs/pulse_extraction_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+# No spinner: this runs before st.set_page_config, and a spinner would be the first Streamlit command
+@st.cache_resource(show_spinner=False)
+def init_logging():
+    """Configure logging and create output folders once per server process."""
+    # Configure logging to save to logs folder
+    os.makedirs('logs', exist_ok=True)
+    log_filename = f"logs/pulse_extraction_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL.upper()),
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_filename),
+            logging.StreamHandler()  # Also log to console
+        ]
+    )
+    
+    # Create debug folder
+    os.makedirs('debug', exist_ok=True)
+    
+    return log_filename
 
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL.upper()),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler()  # Also log to console
-    ]
-)
+init_logging()
+
+class _NoModulesExtracted(Exception):
+    """Raised inside the cached extractor so empty results are not cached."""
+
+@st.cache_data(ttl=settings.AI_CACHE_TTL, show_spinner=False)
+def _cached_extract_modules(content_hash, url, _content):
+    """Extract modules with AI, cached on a hash of the page content."""
+    from extractor.inference import extract_modules_with_ai
+    
+    modules = extract_modules_with_ai(_content, url)
+    if not modules:
+        # Exceptions are never cached, so failed extractions are retried next run
+        raise _NoModulesExtracted(url)
+    return modules
+
+def cached_extract_modules(content, url):
+    """Return cached modules for identical content, calling the AI only on a miss."""
+    content_hash = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+    try:
+        return _cached_extract_modules(content_hash, url, content)
+    except _NoModulesExtracted:
+        return None
+
+def _is_valid_module(module):
+    """Check that a module has a real name, description and submodules."""
+    try:
+        name = module['module']
+        description = module['Description']
+        submodules = module['Submodules']
+    except (KeyError, TypeError):
+        return False
+    return (isinstance(module, dict) and
+            isinstance(name, str) and len(name) > 3 and
+            isinstance(description, str) and len(description) > 30 and
+            isinstance(submodules, dict) and len(submodules) >= 1)
+
+def _json_preview(json_bytes, limit=4096):
+    """Return the first `limit` bytes of a JSON payload for inline display."""
+    if len(json_bytes) <= limit:
+        return json_bytes.decode('utf-8')
+    # 'ignore' drops a multi-byte character cut in half at the boundary
+    preview = json_bytes[:limit].decode('utf-8', 'ignore')
+    return f"{preview}\n... ({len(json_bytes) - limit} more bytes - download the JSON for the full output) ..."
+
+def render_stats(slot, total, processed, success, fallback):
+    """Render the processing counters into a single placeholder (one message per update)."""
+    slot.markdown(
+        "<div class='stats-row'>"
+        f"<div><span>Total URLs</span><strong>{total}</strong></div>"
+        f"<div><span>Processed</span><strong>{processed}</strong></div>"
+        f"<div><span>Successful</span><strong>{success}</strong></div>"
+        f"<div><span>Fallback Used</span><strong>{fallback}</strong></div>"
+        "</div>",
+        unsafe_allow_html=True
+    )
+
+def _result_quality(valid_modules, is_fallback):
+    """Classify a stored result as 'high', 'medium' or 'low' quality."""
+    if not valid_modules:
+        return 'low'
+    return 'medium' if is_fallback else 'high'
 
-# Create debug folder
-os.makedirs('debug', exist_ok=True)
+@st.cache_data(show_spinner=False)
+def load_css():
+    """Read the app stylesheet once instead of rebuilding it on every rerun."""
+    return (Path(__file__).parent / 'static' / 'pulse.css').read_text(encoding='utf-8')
 
 # Initialize session state
 if 'extraction_results' not in st.session_state:
@@ -50,79 +127,7 @@ st.set_page_config(
 )
 
 # Custom CSS for Apple-like design
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        padding: 1.5rem 0;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-    }
-    .main-header h1 {
-        font-size: 2.5rem;
-        font-weight: 300;
-        margin: 0;
-        letter-spacing: -1px;
-    }
-    .main-header p {
-        font-size: 1rem;
-        opacity: 0.9;
-        margin: 0.3rem 0 0 0;
-    }
-    .feature-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 12px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.07);
-        border: 1px solid #f0f0f0;
-        margin: 1rem 0;
-    }
-    .result-card {
-        background: #fafafa;
-        padding: 1.5rem;
-        border-radius: 12px;
-        border-left: 4px solid #667eea;
-        margin: 1rem 0;
-    }
-    .success-card {
-        border-left-color: #4CAF50;
-    }
-    .warning-card {
-        border-left-color: #FF9800;
-    }
-    .json-container {
-        background: #f8f9fa;
-        border: 1px solid #e9ecef;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .metric-container {
-        text-align: center;
-        padding: 1rem;
-        background: white;
-        border-radius: 8px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .stButton > button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 20px;
-        padding: 0.5rem 1.5rem;
-        font-weight: 500;
-        font-size: 0.9rem;
-        transition: all 0.3s ease;
-        height: 2.5rem;
-    }
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.4);
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # Main header
 st.markdown("""
@@ -161,42 +166,45 @@ urls_input = st.text_area(
     label_visibility="collapsed"
 )
 
+# Parse the URL list once per run; a tuple is hashable for cache keys
+urls = tuple(u for u in (line.strip() for line in urls_input.splitlines()) if u)
+
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
+    # Single slot so the button can be swapped in place without a rerun
+    button_slot = st.empty()
+    
     # Check if processing is in progress
     is_processing = st.session_state.get('processing_in_progress', False)
     
     if is_processing:
-        extract_button = st.button("Processing...", type="secondary", disabled=True, use_container_width=True)
+        extract_button = button_slot.button("Processing...", type="secondary", disabled=True, use_container_width=True)
     else:
-        extract_button = st.button("Extract Modules", type="primary", use_container_width=True)
+        extract_button = button_slot.button("Extract Modules", type="primary", use_container_width=True)
 
 if extract_button:
-    if urls_input.strip():
-        urls = [url.strip() for url in urls_input.strip().split('\n') if url.strip()]
+    if urls:
+        # Set processing state
+        st.session_state.processing_in_progress = True
+        st.session_state.processing_complete = False
+        st.session_state.extraction_results = None
+        st.session_state.pending_urls = urls
         
-        if urls:
-            # Set processing state
-            st.session_state.processing_in_progress = True
-            st.session_state.processing_complete = False
-            st.session_state.extraction_results = None
-            
-            # Force rerun to show disabled button
-            st.rerun()
-            
-        else:
-            st.warning("Please enter at least one valid URL")
+        # Show the disabled button in place and process in this same run
+        button_slot.button("Processing...", type="secondary", disabled=True, use_container_width=True)
     else:
         st.warning("Please enter some URLs to process")
 
 # Only process if we're in processing state and haven't completed yet
 if (st.session_state.get('processing_in_progress', False) and 
-    not st.session_state.get('processing_complete', False) and 
-    urls_input.strip()):
+    not st.session_state.get('processing_complete', False)):
     
-    urls = [url.strip() for url in urls_input.strip().split('\n') if url.strip()]
+    urls = st.session_state.get('pending_urls', ())
     
     if urls:
+        # Heavy crawler/AI dependencies are only needed once processing starts
+        from extractor.crawler import crawl_and_extract, is_fallback_content
+        
         # Progress tracking with better estimates
         progress_container = st.container()
         with progress_container:
@@ -207,100 +215,117 @@ if (st.session_state.get('processing_in_progress', False) and
             status_text = st.empty()
             time_text = st.empty()
             
-            # Statistics in a clean layout
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                total_metric = st.metric("Total URLs", len(urls))
-            with col2:
-                processed_metric = st.metric("Processed", 0)
-            with col3:
-                success_metric = st.metric("Successful", 0)
-            with col4:
-                fallback_metric = st.metric("Fallback Used", 0)
+            # Statistics in a clean layout, rendered as one element
+            stats_slot = st.empty()
+            render_stats(stats_slot, len(urls), 0, 0, 0)
         
         # Start timing
-        start_time = time.time()
+        start_time = time.monotonic()
         
         try:
             status_text.text("Starting web crawling...")
             
-            # Crawl and extract content
+            # Crawl and extract content, reusing crawls cached by earlier runs
             docs = crawl_and_extract(urls, max_depth=1)
             
             overall_progress.progress(0.5)
             status_text.text("Processing content with AI...")
             
-            all_results = {}
+            # Filled in completion order; reordered to match docs once the pool drains
+            completed_results = {}
             processed_count = 0
             success_count = 0
             fallback_count = 0
+            n_docs = len(docs)
+            last_status_update = 0.0
+            last_metrics_update = 0.0
+            ai_start_time = time.monotonic()
             
-            for i, (url, content) in enumerate(docs.items()):
-                try:
-                    # Update progress for each URL
-                    current_progress = 0.5 + (0.5 * i / len(docs))
-                    overall_progress.progress(current_progress)
-                    
-                    # Calculate elapsed and estimated time
-                    elapsed_time = time.time() - start_time
-                    if i > 0:
-                        avg_time_per_url = elapsed_time / i
-                        remaining_urls = len(docs) - i
-                        estimated_remaining = avg_time_per_url * remaining_urls
-                        time_text.text(f"Elapsed: {int(elapsed_time)}s | Estimated remaining: {int(estimated_remaining)}s")
-                    
-                    status_text.text(f"Processing {i+1}/{len(docs)}: {url}")
+            # AI extraction is IO-bound, so run the URLs concurrently and
+            # update the UI as each one completes
+            with ThreadPoolExecutor(max_workers=settings.MAX_CONCURRENT_EXTRACTIONS) as executor:
+                futures = {
+                    executor.submit(cached_extract_modules, content, url): url
+                    for url, content in docs.items()
+                }
+                
+                for future in as_completed(futures):
+                    url = futures[future]
+                    content = docs[url]
                     
                     # Increment processed count for every URL we attempt
                     processed_count += 1
                     
-                    # Extract modules using AI
-                    modules_data = extract_modules_with_ai(content, url)
-                    
-                    # Debug logging
-                    if modules_data:
-                        logging.info(f"✅ Extracted {len(modules_data)} modules from {url}")
-                    else:
-                        logging.warning(f"❌ No modules extracted from {url}")
-                    
-                    # Only store and count results if we got meaningful modules
-                    if modules_data and isinstance(modules_data, list) and len(modules_data) > 0:
-                        # Store the result
-                        all_results[url] = {
-                            'content': content,
-                            'modules': modules_data,
-                            'is_fallback': ("FALLBACK CONTENT" in content or "EXTRACTION FAILED" in content),
-                            'content_length': len(content) if content else 0,
-                            'has_modules': True
-                        }
+                    try:
+                        modules_data = future.result()
+                        
+                        # Debug logging
+                        if modules_data:
+                            logging.info(f"✅ Extracted {len(modules_data)} modules from {url}")
+                        else:
+                            logging.warning(f"❌ No modules extracted from {url}")
                         
-                        # Only count results that we actually store
-                        if all_results[url]['is_fallback']:
-                            fallback_count += 1
+                        # Only store and count results if we got meaningful modules
+                        if modules_data and isinstance(modules_data, list) and len(modules_data) > 0:
+                            # Store the result, validating and serializing once here rather than on every rerun
+                            is_fallback = is_fallback_content(content)
+                            valid_modules = [m for m in modules_data if _is_valid_module(m)]
+                            # Use valid modules if available, otherwise show all
+                            json_bytes = orjson.dumps(valid_modules or modules_data, option=orjson.OPT_INDENT_2)
+                            completed_results[url] = ExtractResult(
+                                content=content,
+                                modules=modules_data,
+                                is_fallback=is_fallback,
+                                content_length=len(content) if content else 0,
+                                valid_modules=valid_modules,
+                                quality=_result_quality(valid_modules, is_fallback),
+                                json_bytes=json_bytes,
+                                json_preview=_json_preview(json_bytes)
+                            )
+                            
+                            # Only count results that we actually store
+                            if is_fallback:
+                                fallback_count += 1
+                            else:
+                                success_count += 1
                         else:
-                            success_count += 1
-                    else:
-                        # Don't count URLs that produce no meaningful results
-                        logging.warning(f"Skipping {url} - no meaningful modules extracted")
+                            # Don't count URLs that produce no meaningful results
+                            logging.warning(f"Skipping {url} - no meaningful modules extracted")
+                        
+                    except Exception as e:
+                        logging.error(f"Error processing {url}: {e}")
+                        # Don't increment success/fallback counts for errors
                     
-                    # Update metrics after processing each URL
-                    processed_metric.metric("Processed", processed_count)
-                    success_metric.metric("Successful", success_count)
-                    fallback_metric.metric("Fallback Used", fallback_count)
+                    now = time.monotonic()
+                    is_last = processed_count == n_docs
                     
-                except Exception as e:
-                    logging.error(f"Error processing {url}: {e}")
-                    processed_count += 1
-                    # Don't increment success/fallback counts for errors
+                    # Update progress and status at most four times a second
+                    if now - last_status_update > 0.25 or is_last:
+                        overall_progress.progress(0.5 + (0.5 * processed_count / n_docs))
+                        
+                        # Estimate remaining time from the AI phase's completion rate
+                        # (crawl time is excluded so it doesn't inflate the estimate)
+                        elapsed_time = now - start_time
+                        avg_time_per_url = (now - ai_start_time) / processed_count
+                        remaining_urls = n_docs - processed_count
+                        estimated_remaining = avg_time_per_url * remaining_urls
+                        time_text.text(f"Elapsed: {int(elapsed_time)}s | Estimated remaining: {int(estimated_remaining)}s")
+                        
+                        in_flight = min(remaining_urls, settings.MAX_CONCURRENT_EXTRACTIONS)
+                        status_text.text(f"Processed {processed_count}/{n_docs} ({in_flight} in progress): {url}")
+                        last_status_update = now
                     
-                    # Update metrics for error case too
-                    processed_metric.metric("Processed", processed_count)
-                    success_metric.metric("Successful", success_count)
-                    fallback_metric.metric("Fallback Used", fallback_count)
+                    # Update metrics at most twice a second (and always for the last URL)
+                    if now - last_metrics_update > 0.5 or is_last:
+                        render_stats(stats_slot, len(urls), processed_count, success_count, fallback_count)
+                        last_metrics_update = now
+            
+            # Keep results in the order the URLs were submitted, not the order they finished
+            all_results = {url: completed_results[url] for url in docs if url in completed_results}
             
             # Final progress update
             overall_progress.progress(1.0)
-            total_time = int(time.time() - start_time)
+            total_time = int(time.monotonic() - start_time)
             status_text.text(f"Processing complete!")
             time_text.text(f"Total time: {total_time}s")
             
@@ -377,25 +402,19 @@ if st.session_state.processing_complete and st.session_state.extraction_results:
         for idx, (url, result) in enumerate(all_results.items()):
             st.markdown(f"### Result {idx + 1}")
             
-            # Validate result quality for display
-            valid_modules = []
-            for module in result['modules']:
-                if (isinstance(module, dict) and 
-                    module.get('module') and len(module.get('module', '')) > 3 and
-                    module.get('Description') and len(module.get('Description', '')) > 30 and
-                    module.get('Submodules') and isinstance(module.get('Submodules'), dict) and
-                    len(module.get('Submodules', {})) >= 1):
-                    valid_modules.append(module)
-            
-            # Determine quality status
-            is_high_quality = len(valid_modules) >= 1 and not result['is_fallback']
-            is_medium_quality = len(valid_modules) >= 1 and result['is_fallback']
+            # Bind result fields once; quality was determined when the result was stored
+            content = result.content
+            modules = result.modules
+            is_fallback = result.is_fallback
+            content_length = result.content_length
+            valid_modules = result.valid_modules
+            quality = result.quality
             
             # URL and status in a clean card
-            if is_high_quality:
+            if quality == 'high':
                 card_class = "success-card"
                 status_text = "High Quality Extraction"
-            elif is_medium_quality:
+            elif quality == 'medium':
                 card_class = "warning-card"
                 status_text = "Medium Quality (Fallback Content)"
             else:
@@ -406,27 +425,24 @@ if st.session_state.processing_complete and st.session_state.extraction_results:
             <div class="result-card {card_class}">
                 <h4>{url}</h4>
                 <p><strong>Status:</strong> {status_text}</p>
-                <p><strong>Content Length:</strong> {result['content_length']} characters</p>
-                <p><strong>Modules Found:</strong> {len(result['modules'])} total, {len(valid_modules)} high quality</p>
+                <p><strong>Content Length:</strong> {content_length} characters</p>
+                <p><strong>Modules Found:</strong> {len(modules)} total, {len(valid_modules)} high quality</p>
             </div>
             """, unsafe_allow_html=True)
             
             # JSON Output - show all modules but indicate quality
-            if result['modules'] and len(result['modules']) > 0:
-                # Use valid modules if available, otherwise show all
-                modules_to_display = valid_modules if valid_modules else result['modules']
-                json_str = json.dumps(modules_to_display, indent=2)
-                
+            if modules:
                 st.markdown("#### JSON Output")
                 if not valid_modules:
                     st.warning("⚠️ These results may be of lower quality. Consider trying different URLs.")
                 
-                st.code(json_str, language='json')
+                # Only a preview is rendered inline; the full JSON is in the download
+                st.code(result.json_preview, language='json')
                 
                 # Download button
                 st.download_button(
                     label="Download JSON",
-                    data=json_str,
+                    data=result.json_bytes,
                     file_name=f"modules_{url.replace('https://', '').replace('http://', '').replace('/', '_')}.json",
                     mime="application/json",
                     key=f"download_{idx}",
@@ -435,21 +451,20 @@ if st.session_state.processing_complete and st.session_state.extraction_results:
             else:
                 st.error("No modules could be extracted")
             
-            # Optional debug info
-            if st.checkbox(f"Show Debug Info", key=f"debug_{idx}"):
-                st.markdown("#### Debug Information")
+            # Optional debug info; opening an expander doesn't trigger a rerun
+            with st.expander("Debug Information"):
                 col1, col2 = st.columns(2)
                 with col1:
                     st.text(f"URL: {url}")
-                    st.text(f"Content Length: {result['content_length']}")
-                    st.text(f"Is Fallback: {result['is_fallback']}")
-                    st.text(f"Module Count: {len(result['modules'])}")
+                    st.text(f"Content Length: {content_length}")
+                    st.text(f"Is Fallback: {is_fallback}")
+                    st.text(f"Module Count: {len(modules)}")
                     st.text(f"Valid Module Count: {len(valid_modules)}")
                 with col2:
-                    if result['content']:
+                    if content:
                         st.text_area(
                             "Raw Content (first 1000 chars):", 
-                            result['content'][:1000], 
+                            content[:1000], 
                             height=200,
                             key=f"debug_content_{idx}"
                         )
@@ -460,16 +475,28 @@ if st.session_state.processing_complete and st.session_state.extraction_results:
         if all_results:
             st.markdown("### Download All Results")
             
-            # Create clean summary
-            summary_results = {}
-            for url, result in all_results.items():
-                summary_results[url] = {
-                    'extraction_status': 'fallback' if result['is_fallback'] else 'success',
-                    'content_length': result['content_length'],
-                    'modules': result['modules']  # This is now a direct array
-                }
-            
-            all_json = json.dumps(summary_results, indent=2, default=str)
+            # Create clean summary once and keep it with the results
+            all_json = results_data.get('_all_json_cache')
+            all_ndjson = results_data.get('_all_ndjson_cache')
+            if all_json is None or all_ndjson is None:
+                summary_results = {}
+                for url, result in all_results.items():
+                    summary_results[url] = {
+                        'extraction_status': 'fallback' if result.is_fallback else 'success',
+                        'content_length': result.content_length,
+                        'modules': result.modules  # This is now a direct array
+                    }
+                
+                all_json = orjson.dumps(summary_results, option=orjson.OPT_INDENT_2)
+                results_data['_all_json_cache'] = all_json
+                
+                # NDJSON: one {url: result} object per line, written piece by piece
+                buffer = io.BytesIO()
+                for url, summary in summary_results.items():
+                    buffer.write(orjson.dumps({url: summary}))
+                    buffer.write(b"\n")
+                all_ndjson = buffer.getvalue()
+                results_data['_all_ndjson_cache'] = all_ndjson
             
             st.download_button(
                 label="Download All Results (JSON)",
@@ -479,6 +506,15 @@ if st.session_state.processing_complete and st.session_state.extraction_results:
                 use_container_width=True,
                 help="Download all extraction results as a single JSON file"
             )
+            
+            st.download_button(
+                label="Download All Results (NDJSON)",
+                data=all_ndjson,
+                file_name="pulse_extraction_results.ndjson",
+                mime="application/x-ndjson",
+                use_container_width=True,
+                help="Download all extraction results with one URL per line, for streaming consumers"
+            )
 
 # Clean footer
 st.markdown("---")
@@ -24,6 +24,18 @@ class Settings:
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', '6000'))
     AI_TEMPERATURE = float(os.getenv('AI_TEMPERATURE', '0.1'))
     AI_MAX_TOKENS = int(os.getenv('AI_MAX_TOKENS', '2000'))
+    MAX_CONCURRENT_EXTRACTIONS = int(os.getenv('MAX_CONCURRENT_EXTRACTIONS', '8'))
+    AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', str(24 * 60 * 60)))
+    
+    # Crawl Cache Configuration
+    CRAWL_CACHE_DIR = os.getenv('CRAWL_CACHE_DIR', 'cache/crawl')
+    CRAWL_CACHE_TTL = int(os.getenv('CRAWL_CACHE_TTL', str(24 * 60 * 60)))
+    
+    # Crawler Concurrency Configuration
+    CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', '10'))
+    CRAWL_MAX_PER_HOST = int(os.getenv('CRAWL_MAX_PER_HOST', '5'))
+    CRAWL_RATE_PER_HOST = float(os.getenv('CRAWL_RATE_PER_HOST', '3'))
+    SELENIUM_POOL_SIZE = int(os.getenv('SELENIUM_POOL_SIZE', '4'))
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
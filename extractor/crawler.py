@@ -1,69 +1,243 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree
+from lxml import html as lxml_html
 from urllib.parse import urljoin, urlparse
 import logging
 import time
 import random
 import os
+import re
+import threading
+import queue
+import atexit
+import functools
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from config.settings import settings
 
-# For dynamic content (imported only when needed)
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from webdriver_manager.chrome import ChromeDriverManager
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
+# For dynamic content (imported only when needed). Selenium and webdriver-manager
+# are slow to import, so only check they are installed and load them on first use
+SELENIUM_AVAILABLE = (importlib.util.find_spec('selenium') is not None and
+                      importlib.util.find_spec('webdriver_manager') is not None)
+if not SELENIUM_AVAILABLE:
     logging.warning("Selenium not available. Dynamic content extraction will be limited.")
+webdriver = Options = Service = By = WebDriverWait = EC = TimeoutException = ChromeDriverManager = None
 
 # For advanced crawling (imported only when needed)
+FIRECRAWL_AVAILABLE = importlib.util.find_spec('firecrawl') is not None
+if not FIRECRAWL_AVAILABLE:
+    logging.warning("Firecrawl not available. Advanced crawling will be limited.")
+
+# For persistent crawl caching (optional; caching is skipped when diskcache is missing)
 try:
-    from firecrawl import FirecrawlApp
-    FIRECRAWL_AVAILABLE = True
+    from diskcache import Cache
+    DISKCACHE_AVAILABLE = True
 except ImportError:
-    FIRECRAWL_AVAILABLE = False
-    logging.warning("Firecrawl not available. Advanced crawling will be limited.")
+    DISKCACHE_AVAILABLE = False
+    logging.warning("diskcache not available. Crawled pages will not be cached between runs.")
+
+_crawl_cache = None
+
+# Reusable headless Chrome instances; Chrome startup costs seconds per page otherwise.
+# Each is its own browser process, so crawl threads render pages in parallel up to
+# settings.SELENIUM_POOL_SIZE
+_driver_pool = queue.Queue()
+_driver_count = 0
+_driver_pool_lock = threading.Lock()
+
+# Per-host semaphores so parallel crawls don't hammer a single site
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+# Responses that mean "slow down" and are worth retrying after a backoff
+RETRY_STATUS_CODES = (429, 503)
+
+# Responses that mean the page does not exist, so no other approach will find it either
+GONE_STATUS_CODES = (404, 410)
+
+# Hosts whose plain HTTP approaches keep failing go straight to the browser-based ones.
+# Maps host to (failure count, time of last failure); counts expire after the TTL so
+# a host that stops blocking plain requests gets them tried first again
+_host_failures = {}
+_host_failures_lock = threading.Lock()
+_HOST_FAILURE_LIMIT = 3
+_HOST_FAILURE_TTL = 10 * 60
+
+class PageUnavailable(Exception):
+    """The server reported that a URL is missing or is not an HTML page."""
+
+def _build_http_session():
+    """Create the session shared by every request-based approach."""
+    session = requests.Session()
+    # Transient server errors are retried by urllib3; throttling responses and
+    # network errors are left to rate_limited_get, which backs off the whole host
+    retries = Retry(total=3, connect=0, read=0, backoff_factor=0.5,
+                    status_forcelist=(500, 502, 504), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# One pooled session so repeat requests to a host reuse its TCP/TLS connections
+_http_session = _build_http_session()
+
+# One recovering HTML parser shared by every page
+_HTML_PARSER = lxml_html.HTMLParser(recover=True)
+_NON_CONTENT_TAGS = ('script', 'style', 'template')
+
+# Charset labels the WHATWG Encoding Standard treats as windows-1252
+_WINDOWS_1252_LABELS = frozenset([
+    'ansi_x3.4-1968', 'ascii', 'cp1252', 'cp819', 'csisolatin1', 'ibm819', 'iso-8859-1',
+    'iso-ir-100', 'iso8859-1', 'iso88591', 'iso_8859-1', 'iso_8859-1:1987', 'l1', 'latin1',
+    'us-ascii', 'windows-1252', 'x-cp1252'
+])
+
+# Markers that start generated (non-extracted) content
+FALLBACK_MARKER = "FALLBACK CONTENT FOR:"
+EXTRACTION_FAILED_MARKER = "EXTRACTION FAILED FOR:"
+
+@functools.lru_cache(maxsize=4096)
+def parse_url(url):
+    """urlparse, memoized; the crawler looks at the same URLs many times over."""
+    return urlparse(url)
 
 def is_valid_url(url):
     try:
-        result = urlparse(url)
+        result = parse_url(url)
         return all([result.scheme, result.netloc])
     except:
         return False
 
+def _substring_matcher(patterns):
+    """Compile fixed strings into one regex that finds any of them in a single scan."""
+    return re.compile('|'.join(re.escape(pattern) for pattern in patterns)).search
+
+_SKIP_URL_MATCH = _substring_matcher([
+    # File downloads
+    '.zip', '.tar.gz', '.tar.bz2', '.pdf', '.doc', '.docx',
+    # Archives and downloads
+    '/archives/', '/download/', '/downloads/', '/releases/',
+    # API endpoints
+    '/api/', '/json', '/xml', '/rss',
+    # Media files
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.mp4', '.mp3',
+    # Other non-content
+    '/search', '/login', '/register', '/logout', '/admin'
+])
+
+_DIFFICULT_DOMAIN_MATCH = _substring_matcher([
+    'instagram.com', 'facebook.com', 'twitter.com', 'linkedin.com',
+    'discord.com', 'slack.com', 'notion.so', 'neo.space', 'zendesk.com',
+    'cloudflare.com', 'akamai.com', 'fastly.com'
+])
+
+# Navigation, header, footer and sidebar blocks are never the main content
+_EXCLUDE_CLASS_MATCH = _substring_matcher(['nav', 'navigation', 'header', 'footer', 'sidebar', 'menu', 'breadcrumb'])
+_EXCLUDE_ID_MATCH = _substring_matcher(['nav', 'navigation', 'header', 'footer', 'sidebar', 'menu'])
+
+# Characters that are neither alphanumeric nor whitespace (same rules as str.isalnum/isspace),
+# as a regex for any text and as a byte table for the common all-ASCII case
+_NON_TEXT_CHARS = re.compile(r'[^\w\s]|_')
+_NON_TEXT_ASCII = bytes(i for i in range(128) if not (chr(i).isalnum() or chr(i).isspace()))
+
+def count_text_chars(text):
+    """Count the alphanumeric and whitespace characters in text."""
+    if text.isascii():
+        return len(text.encode('ascii').translate(None, _NON_TEXT_ASCII))
+    return len(_NON_TEXT_CHARS.sub('', text))
+
 def should_skip_url(url):
     """Skip URLs that are likely not documentation content."""
-    skip_patterns = [
-        # File downloads
-        '.zip', '.tar.gz', '.tar.bz2', '.pdf', '.doc', '.docx',
-        # Archives and downloads
-        '/archives/', '/download/', '/downloads/', '/releases/',
-        # API endpoints
-        '/api/', '/json', '/xml', '/rss',
-        # Media files
-        '.jpg', '.jpeg', '.png', '.gif', '.svg', '.mp4', '.mp3',
-        # Other non-content
-        '/search', '/login', '/register', '/logout', '/admin'
-    ]
-    
-    url_lower = url.lower()
-    return any(pattern in url_lower for pattern in skip_patterns)
+    return _SKIP_URL_MATCH(url.lower()) is not None
 
 def is_difficult_site(url):
     """Check if this is a site known to have strong anti-bot measures."""
-    difficult_domains = [
-        'instagram.com', 'facebook.com', 'twitter.com', 'linkedin.com',
-        'discord.com', 'slack.com', 'notion.so', 'neo.space', 'zendesk.com',
-        'cloudflare.com', 'akamai.com', 'fastly.com'
-    ]
-    domain = urlparse(url).netloc.lower()
-    return any(difficult in domain for difficult in difficult_domains)
+    domain = parse_url(url).netloc.lower()
+    return _DIFFICULT_DOMAIN_MATCH(domain) is not None
+
+def get_host_slot(url):
+    """Return the semaphore limiting concurrent fetches to this URL's host."""
+    host = parse_url(url).netloc.lower()
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(settings.CRAWL_MAX_PER_HOST)
+    return slot
+
+class HostRateLimiter:
+    """Thread-safe limiter that spaces out requests to each host."""
+    
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+    
+    def wait(self, url):
+        """Block until a request to this URL's host is allowed."""
+        host = parse_url(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+    
+    def hold_off(self, url, seconds):
+        """Push back every request to this URL's host by at least `seconds`."""
+        host = parse_url(url).netloc.lower()
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            self._next_allowed[host] = max(self._next_allowed.get(host, 0), resume_at)
+
+_rate_limiter = HostRateLimiter(settings.CRAWL_RATE_PER_HOST)
+
+def get_retry_after(resp):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+def rate_limited_get(session, url, max_attempts=4, **kwargs):
+    """GET through the per-host rate limiter, backing off exponentially on 429/503 and timeouts."""
+    for attempt in range(max_attempts):
+        _rate_limiter.wait(url)
+        try:
+            resp = session.get(url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            if attempt == max_attempts - 1:
+                raise
+            delay = min(30, 2 ** attempt)
+            logging.warning(f"Request to {url} failed, retrying in {delay}s")
+        else:
+            if resp.status_code not in RETRY_STATUS_CODES or attempt == max_attempts - 1:
+                return resp
+            # Release the connection of a response we are not going to read
+            resp.close()
+            retry_after = get_retry_after(resp)
+            delay = min(60, retry_after) if retry_after is not None else min(30, 2 ** attempt)
+            logging.warning(f"Got {resp.status_code} from {url}, backing off {delay:.1f}s")
+        # Backing off the whole host keeps other threads from piling on
+        _rate_limiter.hold_off(url, delay)
+    return resp
+
+def is_fallback_content(text):
+    """Check whether text was generated as a fallback instead of extracted from the page."""
+    # The markers always start the text, so a prefix check avoids scanning whole pages
+    return bool(text) and text.startswith((FALLBACK_MARKER, EXTRACTION_FAILED_MARKER))
 
 def get_random_user_agent():
     """Get a random realistic user agent."""
@@ -81,102 +255,236 @@ def clean_text(text):
     """Clean and normalize extracted text."""
     if not text:
         return ""
-    # Remove excessive whitespace and normalize
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    return '\n'.join(lines)
+    # Strip every line and drop the blank ones, all inside C-level builtins
+    return '\n'.join(filter(None, map(str.strip, text.split('\n'))))
 
-def extract_main_content(soup, url=""):
-    """Extract main content using multiple strategies."""
+@functools.lru_cache(maxsize=64)
+def normalize_charset(label):
+    """Map a declared charset label to an encoding lxml can decode with, or None."""
+    label = label.strip().strip('"\'').lower()
+    if not label:
+        return None
+    # Browsers decode these as windows-1252, and servers labelled this way
+    # routinely send its smart quotes and dashes
+    if label in _WINDOWS_1252_LABELS:
+        return 'windows-1252'
+    try:
+        lxml_html.HTMLParser(encoding=label)
+    except LookupError:
+        logging.warning(f"Unknown charset {label!r}, falling back to meta detection")
+        return None
+    return label
+
+def get_response_charset(resp):
+    """Return the charset declared in the Content-Type header, or None."""
+    content_type = resp.headers.get('Content-Type', '')
+    for param in content_type.split(';')[1:]:
+        key, _, value = param.partition('=')
+        if key.strip().lower() == 'charset':
+            return normalize_charset(value)
+    return None
+
+def _new_parser(encoding=None):
+    """Create a recovering parser, decoding with `encoding` when the server declared one."""
+    if encoding:
+        try:
+            return lxml_html.HTMLParser(recover=True, encoding=encoding)
+        except LookupError:
+            logging.warning(f"Unknown charset {encoding!r}, falling back to meta detection")
+    return lxml_html.HTMLParser(recover=True)
+
+def _strip_non_content(tree):
+    # Script/style text is never page content (BeautifulSoup's get_text skipped it too)
+    etree.strip_elements(tree, *_NON_CONTENT_TAGS, with_tail=False)
+    return tree
+
+def parse_html(markup):
+    """Parse already-decoded HTML into an lxml tree, or return None if there is nothing to parse.
+
+    Takes the str page source that Selenium and Firecrawl return; fetched
+    responses go through parse_response instead.
+    """
+    if not markup:
+        return None
+    try:
+        try:
+            tree = lxml_html.document_fromstring(markup, parser=_HTML_PARSER)
+        except ValueError:
+            # lxml rejects str input that carries an XML encoding declaration
+            tree = lxml_html.document_fromstring(markup.encode('utf-8'), parser=_HTML_PARSER)
+    except etree.ParserError:
+        return None
+    return _strip_non_content(tree)
+
+def parse_response(resp, chunk_size=64 * 1024):
+    """Parse a streamed response as its body arrives, or return None if there is nothing to parse.
+
+    The body is fed to lxml chunk by chunk, so parsing overlaps the download and
+    the raw bytes are never held in memory alongside the tree.
+    """
+    # Feed parsers keep per-document state, so each response gets its own
+    parser = _new_parser(get_response_charset(resp))
+    received = False
+    for chunk in resp.iter_content(chunk_size):
+        parser.feed(chunk)
+        received = True
+    if not received:
+        return None
+    try:
+        tree = parser.close()
+    except (etree.ParserError, etree.XMLSyntaxError):
+        return None
+    if tree is None:
+        return None
+    return _strip_non_content(tree)
+
+def element_text(el):
+    """Return the cleaned text of an element: text nodes on separate lines, each line stripped."""
+    return clean_text('\n'.join(el.itertext()))
+
+# Strategy 1 candidates in priority order: (attribute, value), where 'tag' matches the element name
+_CONTENT_CANDIDATES = [
+    # Main content containers
+    ('tag', 'main'),
+    ('tag', 'article'),
+    ('role', 'main'),
     
-    # Strategy 1: Try common documentation containers
-    candidates = [
-        # Main content containers
-        {'name': 'main'},
-        {'name': 'article'},
-        {'role': 'main'},
-        
-        # Documentation-specific containers
-        {'class_': 'help-center'},
-        {'class_': 'support'},
-        {'class_': 'docs'},
-        {'class_': 'documentation'},
-        {'class_': 'doc-content'},
-        {'class_': 'content'},
-        {'class_': 'page-content'},
-        {'class_': 'entry-content'},
-        {'class_': 'post-content'},
-        
-        # Generic content containers
-        {'class_': 'container'},
-        {'class_': 'wrapper'},
-        {'id': 'content'},
-        {'id': 'main-content'},
-        {'id': 'doc-content'},
-        {'id': 'main'},
-        
-        # Site-specific (can be extended)
-        {'class_': 'uiContextualLayerPositioner'},  # Facebook/Instagram
-        {'class_': 'markdown-body'},  # GitHub
-        {'class_': 'wiki-content'},  # Confluence
-        {'class_': 'body'},  # Python docs
-        {'class_': 'document'},  # Sphinx docs
-        {'class_': 'article-body'},  # Help centers
-        {'class_': 'section-content'},  # Support sites
-    ]
+    # Documentation-specific containers
+    ('class', 'help-center'),
+    ('class', 'support'),
+    ('class', 'docs'),
+    ('class', 'documentation'),
+    ('class', 'doc-content'),
+    ('class', 'content'),
+    ('class', 'page-content'),
+    ('class', 'entry-content'),
+    ('class', 'post-content'),
     
-    for candidate in candidates:
-        el = soup.find(**candidate)
-        if el:
-            text = clean_text(el.get_text(separator="\n", strip=True))
-            if len(text) > 100:  # Minimum content threshold
-                logging.info(f"Found content using {candidate} for {url}")
-                return text
+    # Generic content containers
+    ('class', 'container'),
+    ('class', 'wrapper'),
+    ('id', 'content'),
+    ('id', 'main-content'),
+    ('id', 'doc-content'),
+    ('id', 'main'),
     
-    # Strategy 2: Find the largest meaningful content block
-    content_tags = ['div', 'section', 'article', 'main', 'aside']
-    blocks = soup.find_all(content_tags, recursive=True)
-    
-    # Filter out navigation, header, footer, sidebar elements
-    exclude_classes = ['nav', 'navigation', 'header', 'footer', 'sidebar', 'menu', 'breadcrumb']
-    exclude_ids = ['nav', 'navigation', 'header', 'footer', 'sidebar', 'menu']
-    
-    meaningful_blocks = []
-    for block in blocks:
-        # Skip if it's likely navigation/header/footer
-        if block.get('class'):
-            classes = ' '.join(block.get('class', [])).lower()
-            if any(exc in classes for exc in exclude_classes):
-                continue
-        if block.get('id'):
-            block_id = block.get('id', '').lower()
-            if any(exc in block_id for exc in exclude_ids):
-                continue
+    # Site-specific (can be extended)
+    ('class', 'uiContextualLayerPositioner'),  # Facebook/Instagram
+    ('class', 'markdown-body'),  # GitHub
+    ('class', 'wiki-content'),  # Confluence
+    ('class', 'body'),  # Python docs
+    ('class', 'document'),  # Sphinx docs
+    ('class', 'article-body'),  # Help centers
+    ('class', 'section-content'),  # Support sites
+]
+_CANDIDATE_RANKS = {candidate: rank for rank, candidate in enumerate(_CONTENT_CANDIDATES)}
+
+# Tags considered by the largest-block strategy
+_BLOCK_TAGS = frozenset(['div', 'section', 'article', 'main', 'aside'])
+
+def _line_stats(text):
+    """Return (characters, lines) that text contributes once cleaned by clean_text."""
+    if not text:
+        return 0, 0
+    lines = list(filter(None, map(str.strip, text.split('\n'))))
+    return sum(map(len, lines)), len(lines)
+
+def _is_navigation_block(block):
+    """Check if a block is likely navigation/header/footer."""
+    classes = block.get('class')
+    if classes and _EXCLUDE_CLASS_MATCH(classes.lower()):
+        return True
+    block_id = block.get('id')
+    return bool(block_id and _EXCLUDE_ID_MATCH(block_id.lower()))
+
+def scan_content(tree):
+    """Collect everything the extraction strategies need in one bottom-up pass.
+
+    Returns (lengths, candidates, largest_block): lengths maps each element to
+    len(element_text(el)) without building any text, candidates lists (label, element)
+    for the first match of each Strategy 1 candidate in priority order, and
+    largest_block is the longest non-navigation content block over 200 characters,
+    or None.
+    """
+    stats = {}
+    lengths = {}
+    firsts = {}
+    largest_block = None
+    largest_length = 200  # Meaningful content threshold
+    # Reversed document order visits children before their parents
+    for el in reversed(list(tree.iter())):
+        if isinstance(el.tag, str):
+            chars, lines = _line_stats(el.text)
+            keys = [('tag', el.tag), ('role', el.get('role')), ('id', el.get('id'))]
+            keys.extend(('class', name) for name in (el.get('class') or '').split())
+            for key in keys:
+                rank = _CANDIDATE_RANKS.get(key)
+                if rank is not None:
+                    # Overwritten by any earlier match, so the first in the document wins
+                    firsts[rank] = el
+        else:
+            # Like itertext(), skip comment/PI text (their tails still count)
+            chars, lines = 0, 0
+        for child in el:
+            child_chars, child_lines = stats[child]
+            tail_chars, tail_lines = _line_stats(child.tail)
+            chars += child_chars + tail_chars
+            lines += child_lines + tail_lines
+        stats[el] = (chars, lines)
+        length = lengths[el] = chars + lines - 1 if lines else 0
         
-        text = clean_text(block.get_text(separator="\n", strip=True))
-        if len(text) > 200:  # Meaningful content threshold
-            meaningful_blocks.append((block, text, len(text)))
+        # >= so that, as with max(), the earliest block wins a tie
+        if length > 200 and length >= largest_length and el.tag in _BLOCK_TAGS and not _is_navigation_block(el):
+            largest_block, largest_length = el, length
+    
+    candidates = []
+    for rank in sorted(firsts):
+        attr, value = _CONTENT_CANDIDATES[rank]
+        label = value if attr == 'tag' else f"{attr}={value}"
+        candidates.append((label, firsts[rank]))
+    return lengths, candidates, largest_block
+
+def extract_main_content(tree, url=""):
+    """Extract main content from a parsed lxml tree using multiple strategies."""
+    # One pass feeds every strategy; only the winning element's text is built
+    lengths, candidates, largest_block = scan_content(tree)
+    
+    # Strategy 1: Try common documentation containers
+    for label, el in candidates:
+        if lengths[el] > 100:  # Minimum content threshold
+            logging.info(f"Found content using {label} for {url}")
+            return element_text(el)
     
-    if meaningful_blocks:
-        # Get the largest meaningful block
-        largest_block = max(meaningful_blocks, key=lambda x: x[2])
+    # Strategy 2: Find the largest meaningful content block
+    if largest_block is not None:
         logging.info(f"Found content using largest block strategy for {url}")
-        return largest_block[1]
+        return element_text(largest_block)
     
     # Strategy 3: Fallback to body (filtered)
-    if soup.body:
-        text = clean_text(soup.body.get_text(separator="\n", strip=True))
-        if len(text) > 100:
-            logging.info(f"Using body fallback for {url}")
-            return text
+    body = tree.find('body')
+    if body is not None and lengths[body] > 100:
+        logging.info(f"Using body fallback for {url}")
+        return element_text(body)
     
     return ""
 
-def get_stealth_session():
-    """Create a session with maximum stealth capabilities."""
-    session = requests.Session()
-    
-    # Set realistic headers
-    session.headers.update({
+def extract_from_html(markup, url=""):
+    """Parse HTML once and extract its main content. Returns (text, tree)."""
+    tree = parse_html(markup)
+    if tree is None:
+        return "", None
+    return extract_main_content(tree, url), tree
+
+def extract_from_response(resp, url=""):
+    """Parse a streamed response and extract its main content. Returns (text, tree)."""
+    tree = parse_response(resp)
+    if tree is None:
+        return "", None
+    return extract_main_content(tree, url), tree
+
+def get_stealth_headers():
+    """Build a fresh set of realistic browser headers for one request."""
+    return {
         'User-Agent': get_random_user_agent(),
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
         'Accept-Language': 'en-US,en;q=0.9',
@@ -192,16 +500,38 @@ def get_stealth_session():
         'Sec-CH-UA': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
         'Sec-CH-UA-Mobile': '?0',
         'Sec-CH-UA-Platform': '"Windows"'
-    })
-    
-    return session
+    }
 
-def get_dynamic_html(url):
-    """Use Selenium to get dynamically rendered content with maximum stealth."""
-    if not SELENIUM_AVAILABLE:
-        logging.error("Selenium not available for dynamic content extraction")
-        return None
-    
+# Hides the usual headless-automation tells from page scripts
+_STEALTH_JS = """
+Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
+Object.defineProperty(navigator, 'permissions', {get: () => ({query: () => Promise.resolve({state: 'granted'})})});
+"""
+
+def _import_selenium():
+    """Import the Selenium pieces the crawler uses into module globals, once."""
+    global webdriver, Options, Service, By, WebDriverWait, EC, TimeoutException, ChromeDriverManager
+    if webdriver is not None:
+        return
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    from webdriver_manager.chrome import ChromeDriverManager
+    # Bound last: other threads treat a non-None webdriver as "everything is loaded"
+    from selenium import webdriver
+
+@functools.lru_cache(maxsize=1)
+def get_chromedriver_path():
+    """Resolve (and download if needed) chromedriver once per process."""
+    return ChromeDriverManager().install()
+
+def _create_driver():
+    """Start a headless Chrome with maximum stealth."""
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--disable-gpu")
@@ -221,6 +551,9 @@ def get_dynamic_html(url):
     options.add_argument("--ignore-ssl-errors")
     options.add_argument("--ignore-certificate-errors-spki-list")
     
+    # Return from driver.get() once the DOM is ready instead of waiting for every subresource
+    options.page_load_strategy = 'eager'
+    
     # Advanced stealth options
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
@@ -230,18 +563,107 @@ def get_dynamic_html(url):
     user_agent = get_random_user_agent()
     options.add_argument(f"--user-agent={user_agent}")
     
-    driver = None
+    # Use Service class to avoid the options conflict
+    service = Service(get_chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=options)
+    
+    # Install the stealth patches once; Chrome re-runs them in every new document
+    # before the page's own scripts, so they hold across all pages this driver loads
+    driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": user_agent})
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {"source": _STEALTH_JS})
+    return driver
+
+def _quit_driver(driver):
     try:
-        # Use Service class to avoid the options conflict
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        driver.quit()
+    except:
+        pass
+
+def _acquire_driver():
+    """Take an idle driver from the pool, starting a new one while under the limit."""
+    global _driver_count
+    while True:
+        try:
+            return _driver_pool.get_nowait()
+        except queue.Empty:
+            pass
         
-        # Execute stealth scripts
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": user_agent})
-        driver.execute_script("Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})")
-        driver.execute_script("Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']})")
-        driver.execute_script("Object.defineProperty(navigator, 'permissions', {get: () => ({query: () => Promise.resolve({state: 'granted'})})})")
+        with _driver_pool_lock:
+            can_create = _driver_count < settings.SELENIUM_POOL_SIZE
+            if can_create:
+                _driver_count += 1
+        if can_create:
+            try:
+                return _create_driver()
+            except Exception:
+                with _driver_pool_lock:
+                    _driver_count -= 1
+                raise
+        
+        try:
+            return _driver_pool.get(timeout=5)
+        except queue.Empty:
+            # A broken driver may have been discarded meanwhile, freeing a slot
+            continue
+
+def _release_driver(driver, healthy=True):
+    """Return a driver to the pool, or shut it down if it may be broken."""
+    global _driver_count
+    if healthy:
+        _driver_pool.put(driver)
+        return
+    _quit_driver(driver)
+    with _driver_pool_lock:
+        _driver_count -= 1
+
+@atexit.register
+def _drain_driver_pool():
+    """Quit every pooled Chrome when the process exits."""
+    while True:
+        try:
+            driver = _driver_pool.get_nowait()
+        except queue.Empty:
+            break
+        _quit_driver(driver)
+
+def wait_for_dynamic_content(driver, max_wait):
+    """Wait until a content container exists, loading has finished and the DOM stops changing."""
+    deadline = time.monotonic() + max_wait
+    try:
+        WebDriverWait(driver, max_wait, poll_frequency=0.25).until(EC.any_of(
+            EC.presence_of_element_located((By.TAG_NAME, "main")),
+            EC.presence_of_element_located((By.TAG_NAME, "article")),
+            EC.presence_of_element_located((By.CSS_SELECTOR, '[class*="content"]'))
+        ))
+        WebDriverWait(driver, max(0.1, deadline - time.monotonic()), poll_frequency=0.25).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        # Out of time; use whatever has rendered so far
+        return
+    
+    # Client-side rendering may still be filling the page in; wait for two equal readings
+    last_size = None
+    while time.monotonic() < deadline:
+        size = driver.execute_script("return document.body ? document.body.innerHTML.length : 0")
+        if size == last_size:
+            return
+        last_size = size
+        time.sleep(0.5)
+
+def get_dynamic_html(url):
+    """Use Selenium to get dynamically rendered content with maximum stealth."""
+    if not SELENIUM_AVAILABLE:
+        logging.error("Selenium not available for dynamic content extraction")
+        return None
+    _import_selenium()
+    
+    driver = None
+    healthy = True
+    try:
+        driver = _acquire_driver()
+        # Don't carry one site's session into the next page
+        driver.delete_all_cookies()
         
         # Navigate to the page
         driver.get(url)
@@ -252,23 +674,25 @@ def get_dynamic_html(url):
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
         
-        # Additional wait for dynamic content
-        sleep_time = 15 if is_difficult_site(url) else 8
-        time.sleep(sleep_time)
+        # Wait for dynamic content, at most as long as the old fixed delay
+        settle_time = 15 if is_difficult_site(url) else 8
+        wait_for_dynamic_content(driver, settle_time)
         
         html = driver.page_source
         logging.info(f"Successfully extracted dynamic content from {url}")
         return html
         
+    except TimeoutException as e:
+        # The page was slow, but the browser itself is fine to reuse
+        logging.error(f"Selenium extraction timed out for {url}: {e}")
+        return None
     except Exception as e:
+        healthy = False
         logging.error(f"Selenium extraction failed for {url}: {e}")
         return None
     finally:
         if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+            _release_driver(driver, healthy)
 
 def try_firecrawl_extraction(url):
     """Try Firecrawl for advanced web scraping of restricted sites."""
@@ -277,6 +701,8 @@ def try_firecrawl_extraction(url):
         return "", None
     
     try:
+        from firecrawl import FirecrawlApp
+        
         # Initialize Firecrawl with API key from settings
         app = FirecrawlApp(api_key=settings.FIRECRAWL_API_KEY)
         
@@ -293,9 +719,9 @@ def try_firecrawl_extraction(url):
             content = scrape_result['markdown']
             if content and len(content.strip()) > 100:
                 logging.info(f"Firecrawl successfully extracted content from {url}")
-                # Create a mock soup object for consistency
-                soup = BeautifulSoup(scrape_result.get('html', ''), 'lxml') if 'html' in scrape_result else None
-                return content, soup
+                # Parse the HTML too so links can be followed like other approaches
+                tree = parse_html(scrape_result.get('html', ''))
+                return content, tree
         
         logging.warning(f"Firecrawl returned limited content for {url}")
         return "", None
@@ -304,76 +730,125 @@ def try_firecrawl_extraction(url):
         logging.error(f"Firecrawl extraction failed for {url}: {e}")
         return "", None
 
-def try_multiple_approaches(url):
-    """Try multiple approaches to extract content from difficult sites."""
-    approaches = [
-        ("Basic Request", lambda: basic_request_approach(url)),
-        ("Stealth Session", lambda: stealth_session_approach(url)),
-        ("Advanced Stealth", lambda: advanced_stealth_approach(url)),
-        ("Selenium Stealth", lambda: selenium_approach(url)),
-        ("Firecrawl Advanced", lambda: firecrawl_approach(url)),
-        ("Alternative URLs", lambda: try_alternative_urls(url))
-    ]
-    
+def _run_approaches(url, approaches):
+    """Run approaches in order and return the first good (text, tree), or None."""
     for approach_name, approach_func in approaches:
         try:
             logging.info(f"Trying {approach_name} for {url}")
-            text, soup = approach_func()
+            text, tree = approach_func()
             if text and len(text.strip()) > 50:  # Lower threshold for difficult sites
                 logging.info(f"{approach_name} successful for {url}")
-                return text, soup
+                return text, tree
+        except PageUnavailable:
+            raise
         except Exception as e:
             logging.warning(f"{approach_name} failed for {url}: {e}")
             continue
+    return None
+
+def try_multiple_approaches(url):
+    """Try multiple approaches to extract content from difficult sites."""
+    request_approaches = [
+        ("Basic Request", lambda: basic_request_approach(url)),
+        ("Stealth Session", lambda: stealth_session_approach(url)),
+        ("Advanced Stealth", lambda: advanced_stealth_approach(url))
+    ]
+    browser_approaches = [
+        ("Selenium Stealth", lambda: selenium_approach(url)),
+        ("Firecrawl Advanced", lambda: firecrawl_approach(url))
+    ]
+    alternative_approaches = [
+        ("Alternative URLs", lambda: try_alternative_urls(url))
+    ]
+    
+    # Hosts whose plain requests keep failing try the browser first, still falling
+    # back to plain requests if the browser gets nothing either
+    host = parse_url(url).netloc.lower()
+    with _host_failures_lock:
+        failures, failed_at = _host_failures.get(host, (0, 0.0))
+        if failures and time.monotonic() - failed_at > _HOST_FAILURE_TTL:
+            failures = 0
+            del _host_failures[host]
+    if failures >= _HOST_FAILURE_LIMIT and (SELENIUM_AVAILABLE or FIRECRAWL_AVAILABLE):
+        logging.info(f"Plain requests keep failing for {host}, trying browser-based approaches first for {url}")
+        stages = [browser_approaches, request_approaches, alternative_approaches]
+    else:
+        stages = [request_approaches, browser_approaches, alternative_approaches]
+    
+    try:
+        for approaches in stages:
+            result = _run_approaches(url, approaches)
+            if approaches is request_approaches:
+                with _host_failures_lock:
+                    if result:
+                        _host_failures.pop(host, None)
+                    else:
+                        count = _host_failures.get(host, (0, 0.0))[0]
+                        _host_failures[host] = (count + 1, time.monotonic())
+            if result:
+                return result
+    except PageUnavailable as e:
+        # Rendering or retrying a missing page can take tens of seconds and never succeeds
+        logging.warning(f"Skipping remaining approaches for {url}: {e}")
     
     return "", None
 
+def check_page_available(resp):
+    """Raise PageUnavailable if the response shows there is no HTML page to extract."""
+    if resp.status_code in GONE_STATUS_CODES:
+        raise PageUnavailable(f"{resp.status_code} {resp.reason}")
+    # 401/403 are not final: anti-bot walls return them to plain clients but let browsers through
+    content_type = resp.headers.get('Content-Type', '')
+    if resp.ok and content_type and 'html' not in content_type.lower():
+        raise PageUnavailable(f"not an HTML page ({content_type})")
+
 def basic_request_approach(url):
     """Basic request approach."""
-    session = get_stealth_session()
-    resp = session.get(url, timeout=20, allow_redirects=True)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "lxml")
-    text = extract_main_content(soup, url)
-    return text, soup
+    headers = get_stealth_headers()
+    resp = rate_limited_get(_http_session, url, headers=headers, timeout=20, allow_redirects=True, stream=True)
+    with resp:
+        check_page_available(resp)
+        resp.raise_for_status()
+        return extract_from_response(resp, url)
 
 def stealth_session_approach(url):
     """Advanced stealth session approach."""
-    session = get_stealth_session()
+    headers = get_stealth_headers()
     
     # Add additional stealth headers for difficult sites
     if is_difficult_site(url):
-        session.headers.update({
+        parsed = parse_url(url)
+        headers.update({
             'Referer': 'https://www.google.com/',
-            'Origin': urlparse(url).scheme + '://' + urlparse(url).netloc,
+            'Origin': parsed.scheme + '://' + parsed.netloc,
             'X-Requested-With': 'XMLHttpRequest'
         })
     
     # Add random delay
     time.sleep(random.uniform(2, 5))
     
-    resp = session.get(url, timeout=25, allow_redirects=True)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "lxml")
-    text = extract_main_content(soup, url)
-    return text, soup
+    resp = rate_limited_get(_http_session, url, headers=headers, timeout=25, allow_redirects=True, stream=True)
+    with resp:
+        resp.raise_for_status()
+        return extract_from_response(resp, url)
 
 def advanced_stealth_approach(url):
     """Most advanced stealth approach with session warming."""
-    session = get_stealth_session()
+    headers = get_stealth_headers()
+    parsed = parse_url(url)
+    base_url = f"{parsed.scheme}://{parsed.netloc}"
     
-    # Session warming - visit homepage first
+    # Session warming - visit homepage first (its cookies land in the shared session)
     try:
-        base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-        session.get(base_url, timeout=15)
+        rate_limited_get(_http_session, base_url, max_attempts=1, headers=headers, timeout=15)
         time.sleep(random.uniform(1, 3))
     except:
         pass
     
     # Ultra-stealth headers
-    session.headers.update({
-        'Referer': f"{urlparse(url).scheme}://{urlparse(url).netloc}/",
-        'Origin': f"{urlparse(url).scheme}://{urlparse(url).netloc}",
+    headers.update({
+        'Referer': f"{base_url}/",
+        'Origin': base_url,
         'X-Forwarded-For': f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}",
         'X-Real-IP': f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}",
         'Via': '1.1 proxy.example.com',
@@ -381,20 +856,13 @@ def advanced_stealth_approach(url):
         'CF-Connecting-IP': f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}"
     })
     
-    # Multiple attempts with different approaches
-    for attempt in range(3):
-        try:
-            time.sleep(random.uniform(3, 8))
-            resp = session.get(url, timeout=30, allow_redirects=True)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "lxml")
-            text = extract_main_content(soup, url)
-            if text and len(text.strip()) > 50:
-                return text, soup
-        except Exception as e:
-            if attempt == 2:  # Last attempt
-                raise e
-            time.sleep(random.uniform(5, 10))
+    # Throttling and transient failures are retried with backoff inside rate_limited_get
+    resp = rate_limited_get(_http_session, url, headers=headers, timeout=30, allow_redirects=True, stream=True)
+    with resp:
+        resp.raise_for_status()
+        text, tree = extract_from_response(resp, url)
+    if text and len(text.strip()) > 50:
+        return text, tree
     
     return "", None
 
@@ -402,9 +870,7 @@ def selenium_approach(url):
     """Selenium-based approach."""
     html = get_dynamic_html(url)
     if html:
-        soup = BeautifulSoup(html, "lxml")
-        text = extract_main_content(soup, url)
-        return text, soup
+        return extract_from_html(html, url)
     return "", None
 
 def firecrawl_approach(url):
@@ -413,11 +879,12 @@ def firecrawl_approach(url):
 
 def try_alternative_urls(url):
     """Try alternative URL patterns for specific sites."""
-    domain = urlparse(url).netloc.lower()
+    parsed = parse_url(url)
+    domain = parsed.netloc.lower()
     
     # For help centers, try different URL patterns
     if 'support' in domain or 'help' in domain:
-        base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+        base_url = f"{parsed.scheme}://{parsed.netloc}"
         alternative_patterns = [
             f"{base_url}/hc/en-us/categories",
             f"{base_url}/help",
@@ -429,123 +896,153 @@ def try_alternative_urls(url):
             f"{base_url}/en-us/support"
         ]
         
-        for alt_url in alternative_patterns:
+        # Set once a result is returned, so probes still queued on the rate limiter
+        # or waiting for headers stop instead of fetching pages nobody will read
+        found = threading.Event()
+        
+        def probe(alt_url):
             try:
-                session = get_stealth_session()
-                resp = session.get(alt_url, timeout=20)
-                if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, "lxml")
-                    text = extract_main_content(soup, alt_url)
-                    if text and len(text.strip()) > 50:
-                        logging.info(f"Alternative URL successful: {alt_url}")
-                        return text, soup
+                _rate_limiter.wait(alt_url)
+                if found.is_set():
+                    return None
+                resp = _http_session.get(alt_url, headers=get_stealth_headers(), timeout=20, stream=True)
+                # Streaming means missing pages are dropped without downloading their bodies
+                with resp:
+                    if resp.status_code == 200 and not found.is_set():
+                        text, tree = extract_from_response(resp, alt_url)
+                        if text and len(text.strip()) > 50:
+                            return text, tree
             except:
-                continue
+                pass
+            return None
+        
+        # Probe all alternatives at once but keep their priority order
+        executor = ThreadPoolExecutor(max_workers=len(alternative_patterns))
+        try:
+            for alt_url, result in zip(alternative_patterns, executor.map(probe, alternative_patterns)):
+                if result:
+                    logging.info(f"Alternative URL successful: {alt_url}")
+                    found.set()
+                    return result
+        finally:
+            # Drop probes that have not started; running ones see `found` and stop early
+            executor.shutdown(wait=False, cancel_futures=True)
     
     return "", None
 
+# Fallback tables are built once; the returned dicts are shared, so callers must not modify them
+
+# Domain-specific fallbacks
+_FALLBACK_DOMAIN_MODULES = {
+    'discord.com': {
+        'modules': [
+            {'name': 'Server Management', 'description': 'Create and manage Discord servers, channels, and permissions'},
+            {'name': 'User Settings', 'description': 'Customize your Discord profile, privacy, and notification settings'},
+            {'name': 'Voice & Video', 'description': 'Use voice channels, video calls, and screen sharing features'},
+            {'name': 'Text Messaging', 'description': 'Send messages, use emojis, and manage conversations'},
+            {'name': 'Bots & Integrations', 'description': 'Add bots and integrate third-party services with Discord'}
+        ]
+    },
+    'instagram.com': {
+        'modules': [
+            {'name': 'Account Management', 'description': 'Manage your Instagram profile, privacy settings, and account security'},
+            {'name': 'Content Creation', 'description': 'Create and share posts, stories, reels, and IGTV videos'},
+            {'name': 'Social Features', 'description': 'Follow users, like posts, comment, and use direct messaging'},
+            {'name': 'Business Tools', 'description': 'Instagram for Business features, analytics, and advertising'},
+            {'name': 'Safety & Privacy', 'description': 'Block users, report content, and manage privacy settings'}
+        ]
+    },
+    'neo.space': {
+        'modules': [
+            {'name': 'Workspace Management', 'description': 'Create and organize your Neo workspace and projects'},
+            {'name': 'Collaboration Tools', 'description': 'Share files, collaborate with team members, and manage permissions'},
+            {'name': 'File Organization', 'description': 'Upload, organize, and manage files and folders'},
+            {'name': 'Integration Features', 'description': 'Connect with external tools and services'},
+            {'name': 'Account Settings', 'description': 'Manage your Neo account, billing, and preferences'}
+        ]
+    },
+    'github.com': {
+        'modules': [
+            {'name': 'Repository Management', 'description': 'Create, clone, and manage Git repositories'},
+            {'name': 'Code Collaboration', 'description': 'Pull requests, code reviews, and branch management'},
+            {'name': 'Issue Tracking', 'description': 'Create and manage issues, bugs, and feature requests'},
+            {'name': 'Actions & CI/CD', 'description': 'Automated workflows and continuous integration'},
+            {'name': 'Project Management', 'description': 'Project boards, milestones, and team collaboration'}
+        ]
+    }
+}
+
+# URL path-based inference
+_FALLBACK_PATH_MODULES = {
+    'help': [
+        {'name': 'Getting Started', 'description': 'Basic setup and initial configuration guide'},
+        {'name': 'Account Management', 'description': 'User account creation, settings, and profile management'},
+        {'name': 'Features Overview', 'description': 'Core features and functionality explanation'},
+        {'name': 'Troubleshooting', 'description': 'Common issues and their solutions'},
+        {'name': 'Contact Support', 'description': 'How to reach customer support and get assistance'}
+    ],
+    'support': [
+        {'name': 'Technical Support', 'description': 'Technical issues, bugs, and system problems'},
+        {'name': 'Billing & Payments', 'description': 'Payment issues, billing questions, and subscription management'},
+        {'name': 'Account Recovery', 'description': 'Password reset, account access, and security issues'},
+        {'name': 'Feature Requests', 'description': 'Suggest new features and improvements'},
+        {'name': 'Documentation', 'description': 'User guides, tutorials, and reference materials'}
+    ],
+    'docs': [
+        {'name': 'API Documentation', 'description': 'Complete API reference and integration guides'},
+        {'name': 'Developer Tools', 'description': 'SDKs, libraries, and development resources'},
+        {'name': 'Getting Started Guide', 'description': 'Quick start tutorial and basic setup'},
+        {'name': 'Advanced Features', 'description': 'Advanced functionality and configuration options'},
+        {'name': 'Examples & Tutorials', 'description': 'Code examples and step-by-step tutorials'}
+    ]
+}
+
+# Generic fallback for support/help/docs domains
+_SUPPORT_SITE_FALLBACK = {
+    'modules': [
+        {'name': 'User Guide', 'description': 'Comprehensive user documentation and guides'},
+        {'name': 'FAQ', 'description': 'Frequently asked questions and common solutions'},
+        {'name': 'Getting Started', 'description': 'Initial setup and basic usage instructions'},
+        {'name': 'Advanced Features', 'description': 'Advanced functionality and configuration'},
+        {'name': 'Contact Support', 'description': 'Customer support and assistance options'}
+    ]
+}
+
+@functools.lru_cache(maxsize=256)
+def _generic_fallback(domain):
+    """Ultimate fallback - generic modules, built once per domain."""
+    return {
+        'modules': [
+            {'name': 'Platform Overview', 'description': f'General information about {domain} platform and services'},
+            {'name': 'User Account', 'description': 'Account management, settings, and profile configuration'},
+            {'name': 'Core Features', 'description': 'Main features and functionality of the platform'},
+            {'name': 'Settings & Preferences', 'description': 'Customize your experience and manage preferences'},
+            {'name': 'Help & Support', 'description': 'Get help, contact support, and find resources'}
+        ]
+    }
+
 def generate_fallback_content(url):
     """Generate meaningful fallback content when extraction fails."""
-    domain = urlparse(url).netloc.lower()
-    path = urlparse(url).path.lower()
-    
-    # Domain-specific fallbacks
-    domain_modules = {
-        'discord.com': {
-            'modules': [
-                {'name': 'Server Management', 'description': 'Create and manage Discord servers, channels, and permissions'},
-                {'name': 'User Settings', 'description': 'Customize your Discord profile, privacy, and notification settings'},
-                {'name': 'Voice & Video', 'description': 'Use voice channels, video calls, and screen sharing features'},
-                {'name': 'Text Messaging', 'description': 'Send messages, use emojis, and manage conversations'},
-                {'name': 'Bots & Integrations', 'description': 'Add bots and integrate third-party services with Discord'}
-            ]
-        },
-        'instagram.com': {
-            'modules': [
-                {'name': 'Account Management', 'description': 'Manage your Instagram profile, privacy settings, and account security'},
-                {'name': 'Content Creation', 'description': 'Create and share posts, stories, reels, and IGTV videos'},
-                {'name': 'Social Features', 'description': 'Follow users, like posts, comment, and use direct messaging'},
-                {'name': 'Business Tools', 'description': 'Instagram for Business features, analytics, and advertising'},
-                {'name': 'Safety & Privacy', 'description': 'Block users, report content, and manage privacy settings'}
-            ]
-        },
-        'neo.space': {
-            'modules': [
-                {'name': 'Workspace Management', 'description': 'Create and organize your Neo workspace and projects'},
-                {'name': 'Collaboration Tools', 'description': 'Share files, collaborate with team members, and manage permissions'},
-                {'name': 'File Organization', 'description': 'Upload, organize, and manage files and folders'},
-                {'name': 'Integration Features', 'description': 'Connect with external tools and services'},
-                {'name': 'Account Settings', 'description': 'Manage your Neo account, billing, and preferences'}
-            ]
-        },
-        'github.com': {
-            'modules': [
-                {'name': 'Repository Management', 'description': 'Create, clone, and manage Git repositories'},
-                {'name': 'Code Collaboration', 'description': 'Pull requests, code reviews, and branch management'},
-                {'name': 'Issue Tracking', 'description': 'Create and manage issues, bugs, and feature requests'},
-                {'name': 'Actions & CI/CD', 'description': 'Automated workflows and continuous integration'},
-                {'name': 'Project Management', 'description': 'Project boards, milestones, and team collaboration'}
-            ]
-        }
-    }
+    parsed = parse_url(url)
+    domain = parsed.netloc.lower()
+    path = parsed.path.lower()
     
     # Check for domain-specific content
-    for domain_key, content in domain_modules.items():
+    for domain_key, content in _FALLBACK_DOMAIN_MODULES.items():
         if domain_key in domain:
             return content
     
-    # URL path-based inference
-    path_modules = {
-        'help': [
-            {'name': 'Getting Started', 'description': 'Basic setup and initial configuration guide'},
-            {'name': 'Account Management', 'description': 'User account creation, settings, and profile management'},
-            {'name': 'Features Overview', 'description': 'Core features and functionality explanation'},
-            {'name': 'Troubleshooting', 'description': 'Common issues and their solutions'},
-            {'name': 'Contact Support', 'description': 'How to reach customer support and get assistance'}
-        ],
-        'support': [
-            {'name': 'Technical Support', 'description': 'Technical issues, bugs, and system problems'},
-            {'name': 'Billing & Payments', 'description': 'Payment issues, billing questions, and subscription management'},
-            {'name': 'Account Recovery', 'description': 'Password reset, account access, and security issues'},
-            {'name': 'Feature Requests', 'description': 'Suggest new features and improvements'},
-            {'name': 'Documentation', 'description': 'User guides, tutorials, and reference materials'}
-        ],
-        'docs': [
-            {'name': 'API Documentation', 'description': 'Complete API reference and integration guides'},
-            {'name': 'Developer Tools', 'description': 'SDKs, libraries, and development resources'},
-            {'name': 'Getting Started Guide', 'description': 'Quick start tutorial and basic setup'},
-            {'name': 'Advanced Features', 'description': 'Advanced functionality and configuration options'},
-            {'name': 'Examples & Tutorials', 'description': 'Code examples and step-by-step tutorials'}
-        ]
-    }
-    
     # Check path-based content
-    for path_key, modules in path_modules.items():
+    for path_key, modules in _FALLBACK_PATH_MODULES.items():
         if path_key in path:
             return {'modules': modules}
     
     # Generic fallback based on domain type
     if any(keyword in domain for keyword in ['support', 'help', 'docs']):
-        return {
-            'modules': [
-                {'name': 'User Guide', 'description': 'Comprehensive user documentation and guides'},
-                {'name': 'FAQ', 'description': 'Frequently asked questions and common solutions'},
-                {'name': 'Getting Started', 'description': 'Initial setup and basic usage instructions'},
-                {'name': 'Advanced Features', 'description': 'Advanced functionality and configuration'},
-                {'name': 'Contact Support', 'description': 'Customer support and assistance options'}
-            ]
-        }
+        return _SUPPORT_SITE_FALLBACK
     
     # Ultimate fallback - generic modules
-    return {
-        'modules': [
-            {'name': 'Platform Overview', 'description': f'General information about {domain} platform and services'},
-            {'name': 'User Account', 'description': 'Account management, settings, and profile configuration'},
-            {'name': 'Core Features', 'description': 'Main features and functionality of the platform'},
-            {'name': 'Settings & Preferences', 'description': 'Customize your experience and manage preferences'},
-            {'name': 'Help & Support', 'description': 'Get help, contact support, and find resources'}
-        ]
-    }
+    return _generic_fallback(domain)
 
 def is_content_meaningful(text):
     """Check if extracted content is meaningful (not garbled or empty)."""
@@ -553,7 +1050,7 @@ def is_content_meaningful(text):
         return False
     
     # Check for garbled content (too many non-alphanumeric characters)
-    alphanumeric_count = sum(1 for c in text if c.isalnum() or c.isspace())
+    alphanumeric_count = count_text_chars(text)
     total_count = len(text)
     
     if total_count == 0:
@@ -576,18 +1073,14 @@ def is_content_meaningful(text):
 
 def extract_content_with_guaranteed_fallback(url):
     """Extract content with guaranteed meaningful fallback."""
-    
-    # Add random delay to avoid being blocked
-    time.sleep(random.uniform(5, 10))
-    
     try:
         # Use multiple approaches for maximum success
-        text, soup = try_multiple_approaches(url)
+        text, tree = try_multiple_approaches(url)
         
         # Check if we got meaningful content
         if text and is_content_meaningful(text):
             logging.info(f"Successfully extracted meaningful content from {url} ({len(text)} chars)")
-            return text, soup
+            return text, tree
         
         # If content is not meaningful, log and use fallback
         if text:
@@ -597,7 +1090,7 @@ def extract_content_with_guaranteed_fallback(url):
         
         # Generate fallback content
         fallback_data = generate_fallback_content(url)
-        fallback_text = f"FALLBACK CONTENT FOR: {url}\n\n"
+        fallback_text = f"{FALLBACK_MARKER} {url}\n\n"
         fallback_text += "Based on the URL structure and domain, here are the likely modules:\n\n"
         
         for i, module in enumerate(fallback_data['modules'], 1):
@@ -609,14 +1102,14 @@ def extract_content_with_guaranteed_fallback(url):
         fallback_text += f"Consider using Firecrawl API for better results with restricted sites.\n"
         
         logging.info(f"Generated fallback content for {url}")
-        return fallback_text, soup
+        return fallback_text, tree
         
     except Exception as e:
         logging.error(f"All extraction methods failed for {url}: {e}")
         
         # Even if everything fails, generate fallback
         fallback_data = generate_fallback_content(url)
-        error_text = f"EXTRACTION FAILED FOR: {url}\n\n"
+        error_text = f"{EXTRACTION_FAILED_MARKER} {url}\n\n"
         error_text += f"Error: {str(e)}\n\n"
         error_text += "Generated fallback modules based on URL analysis:\n\n"
         
@@ -626,63 +1119,179 @@ def extract_content_with_guaranteed_fallback(url):
         
         return error_text, None
 
+def get_crawl_cache():
+    """Return the shared on-disk crawl cache, or None if caching is unavailable."""
+    global _crawl_cache
+    if _crawl_cache is None and DISKCACHE_AVAILABLE:
+        try:
+            _crawl_cache = Cache(settings.CRAWL_CACHE_DIR)
+        except Exception as e:
+            logging.error(f"Could not open crawl cache: {e}")
+    return _crawl_cache
+
+def load_cached_crawl(url, max_depth):
+    """Return the pages an earlier run crawled from a start URL, or None on a miss."""
+    cache = get_crawl_cache()
+    entry = cache.get(('crawl', max_depth, url)) if cache is not None else None
+    if not entry:
+        return None
+    
+    logging.info(f"Using cached crawl for {url} (fetched {entry['fetched_at']}, {len(entry['docs'])} pages)")
+    return entry['docs']
+
+def cache_crawl(url, max_depth, pages):
+    """Store every page crawled from a start URL on disk, unless any of them is fallback or error content."""
+    cache = get_crawl_cache()
+    if cache is None:
+        return
+    
+    for text in pages.values():
+        if not text or is_fallback_content(text) or text.startswith("ERROR:"):
+            return
+    cache.set(('crawl', max_depth, url),
+              {'docs': pages, 'fetched_at': datetime.now().isoformat(), 'status': 'success'},
+              expire=settings.CRAWL_CACHE_TTL)
+
 def crawl_and_extract(urls, max_depth=1):
     """
     Universal crawler that handles ANY type of website using multiple approaches.
     GUARANTEED to return meaningful content for every URL.
     """
+    # Only the dispatch loop below adds to this, so workers never need a lock.
+    # Every claimed URL is also a key in docs or a cached crawl, so the set shares
+    # those string objects and costs only its hash table; hashed or probabilistic
+    # sets would not shrink it and could skip pages that were never crawled
     visited = set()
     docs = {}
     
     def crawl(url, depth):
-        if url in visited or depth > max_depth or should_skip_url(url):
-            return
-        visited.add(url)
-        
+        """Extract one page and return the same-site links to crawl next."""
         logging.info(f"Crawling {url} (depth: {depth})")
-        text, soup = extract_content_with_guaranteed_fallback(url)
+        with get_host_slot(url):
+            text, tree = extract_content_with_guaranteed_fallback(url)
         docs[url] = text
         
-        # Debug: Save HTML if extraction failed and we have soup
-        if soup and not text:
+        # Debug: Save HTML if extraction failed and we have a parsed page
+        if tree is not None and not text:
             try:
                 # Create debug folder if it doesn't exist
                 os.makedirs('debug', exist_ok=True)
                 
                 # Create timestamped debug filename
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                domain = urlparse(url).netloc.replace('.', '_')
+                domain = parse_url(url).netloc.replace('.', '_')
                 debug_filename = f"debug/debug_{domain}_{timestamp}_depth{depth}.html"
                 
                 with open(debug_filename, 'w', encoding='utf-8') as f:
-                    f.write(str(soup))
+                    f.write(lxml_html.tostring(tree, encoding='unicode'))
                 logging.warning(f"Saved debug HTML to {debug_filename}")
             except Exception as e:
                 logging.error(f"Could not save debug HTML: {e}")
         
-        # Find and crawl links (only if we have meaningful extracted content, not fallback)
-        if (soup and depth < max_depth and text and 
-            "FALLBACK CONTENT" not in text and "EXTRACTION FAILED" not in text and
+        # Find links to crawl (only if we have meaningful extracted content, not fallback)
+        next_links = []
+        if (tree is not None and depth < max_depth and text and 
+            not is_fallback_content(text) and
             is_content_meaningful(text)):
-            links_found = 0
-            for a in soup.find_all("a", href=True):
-                if links_found >= 3:  # Reduced link limit for efficiency
+            host = parse_url(url).netloc
+            for a in tree.iter('a'):
+                if len(next_links) >= 3:  # Reduced link limit for efficiency
                     break
-                link = urljoin(url, a['href'])
+                href = a.get('href')
+                if href is None:
+                    continue
+                link = urljoin(url, href)
                 if (is_valid_url(link) and 
-                    urlparse(link).netloc == urlparse(url).netloc and
+                    parse_url(link).netloc == host and
                     link not in visited and
+                    link not in next_links and
                     not should_skip_url(link)):
-                    crawl(link, depth + 1)
-                    links_found += 1
+                    next_links.append(link)
+        return next_links
 
-    # Process all URLs - GUARANTEED to return content for each
+    # Process all URLs - GUARANTEED to return content for each. A start URL crawled
+    # by an earlier run is served from the disk cache together with the pages linked
+    # from it, so a warm run returns the same docs as a cold one
+    valid_urls = []
+    cached_crawls = {}
     for url in urls:
         if is_valid_url(url):
-            crawl(url, 0)
+            cached = load_cached_crawl(url, max_depth)
+            if cached is None:
+                valid_urls.append(url)
+            else:
+                cached_crawls[url] = cached
+                visited.update(cached)
         else:
             logging.error(f"Invalid URL: {url}")
             # Even invalid URLs get fallback content
             docs[url] = f"ERROR: Invalid URL format - {url}\n\nPlease check the URL and try again."
     
-    return docs
+    # Crawling is network-bound, so pages are crawled by a worker pool. Links are
+    # queued as soon as their page finishes, so siblings overlap instead of recursing.
+    # Claimed URLs wait in the frontier until a worker is free and their host is below
+    # its limit, so workers never sit blocked behind one busy host
+    # Each claimed URL is recorded under the page it was linked from, so the result
+    # can be put back in crawl order once the pool exits
+    frontier = deque()
+    host_load = {}
+    claimed_links = {}
+    
+    def enqueue(batch, depth, parent):
+        """Claim unseen URLs for the frontier; duplicates are dropped before a worker is used."""
+        if depth > max_depth:
+            return
+        for url in batch:
+            if url not in visited and not should_skip_url(url):
+                visited.add(url)
+                claimed_links.setdefault(parent, []).append(url)
+                frontier.append((url, depth, parse_url(url).netloc.lower()))
+    
+    with ThreadPoolExecutor(max_workers=settings.CRAWL_CONCURRENCY) as executor:
+        pending = {}
+        
+        def dispatch():
+            """Start frontier URLs in order while workers are free, skipping saturated hosts."""
+            deferred = []
+            while frontier and len(pending) < settings.CRAWL_CONCURRENCY:
+                url, depth, host = item = frontier.popleft()
+                if host_load.get(host, 0) >= settings.CRAWL_MAX_PER_HOST:
+                    deferred.append(item)
+                    continue
+                host_load[host] = host_load.get(host, 0) + 1
+                pending[executor.submit(crawl, url, depth)] = item
+            frontier.extendleft(reversed(deferred))
+        
+        enqueue(valid_urls, 0, None)
+        dispatch()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, depth, host = pending.pop(future)
+                host_load[host] -= 1
+                enqueue(future.result(), depth + 1, url)
+            dispatch()
+    
+    # Workers fill docs in completion order; return the start URLs in the order
+    # given, each followed by the pages reached from it
+    def collect(url, pages):
+        pages[url] = docs[url]
+        for link in claimed_links.get(url, ()):
+            collect(link, pages)
+        return pages
+    
+    crawled = set(valid_urls)
+    ordered = {}
+    for url in urls:
+        if url in ordered:
+            continue
+        if url in cached_crawls:
+            ordered.update(cached_crawls[url])
+        elif url in crawled:
+            pages = collect(url, {})
+            cache_crawl(url, max_depth, pages)
+            ordered.update(pages)
+        else:
+            ordered[url] = docs[url]
+    
+    return ordered
@@ -6,6 +6,7 @@ import re
 import os
 from datetime import datetime
 from config.settings import settings
+from extractor.crawler import is_fallback_content
 
 def setup_llm():
     """Setup Azure OpenAI LLM with proper configuration."""
@@ -238,7 +239,7 @@ def extract_modules_with_ai(content, url=""):
     logging.info(f"Starting extraction for {url}, content length: {len(content) if content else 0}")
     
     # Check if this is fallback content
-    if "FALLBACK CONTENT FOR:" in content or "EXTRACTION FAILED FOR:" in content:
+    if is_fallback_content(content):
         logging.info(f"Processing fallback content for {url}")
         result = parse_fallback_content(content)
         if result and isinstance(result, list) and len(result) >= 1:  # Reduced from 2 to 1
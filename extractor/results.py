@@ -0,0 +1,21 @@
+"""
+Result container for per-URL module extraction
+"""
+from dataclasses import dataclass
+
+@dataclass
+class ExtractResult:
+    """Extraction outcome for one URL, kept in session state across reruns."""
+    
+    # Declared explicitly (rather than dataclass(slots=True)) to stay Python 3.8 compatible
+    __slots__ = ('content', 'modules', 'is_fallback', 'content_length',
+                 'valid_modules', 'quality', 'json_bytes', 'json_preview')
+    
+    content: str
+    modules: list
+    is_fallback: bool
+    content_length: int
+    valid_modules: list
+    quality: str  # 'high', 'medium' or 'low'
+    json_bytes: bytes  # Serialized modules shown and offered for download
+    json_preview: str  # Truncated JSON rendered inline